@@ -0,0 +1,32 @@
+from rest_framework import serializers
+
+
+def keyset_batches(queryset, batch_size=2000):
+    """
+    Yield the rows of a values() queryset as lists, batch_size at a time.
+    Batches are fetched by primary key (keyset) rather than with a
+    server-side cursor, which a transaction-mode connection pooler
+    can't hold open across a streamed response.
+    """
+    queryset = queryset.order_by('pk')
+    last_pk = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last_pk = batch[-1]['id']
+
+
+def format_datetimes(batches, fields):
+    """
+    Render the given datetime columns of each row the way the API
+    serializers do (local TIME_ZONE, DRF's DATETIME_FORMAT) rather than
+    the UTC values that values() returns
+    """
+    to_representation = serializers.DateTimeField().to_representation
+    for batch in batches:
+        for row in batch:
+            for field in fields:
+                row[field] = to_representation(row[field])
+        yield batch
@@ -0,0 +1,11 @@
+from django.contrib.auth.hashers import Argon2PasswordHasher
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """
+    Argon2id at OWASP's baseline parameters (19 MiB, 2 passes, 1 lane).
+    Django's defaults (100 MiB, 8 lanes) are sized for machines with many
+    cores; on a small web dyno they cost about as much as PBKDF2.
+    """
+    memory_cost = 19456
+    parallelism = 1
@@ -0,0 +1,69 @@
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+@lru_cache(maxsize=None)
+def related_lookups(serializer_class):
+    """
+    Work out the select_related and prefetch_related lookups a
+    ModelSerializer needs, from the `source` of each of its fields.
+    Returns a (select_related, prefetch_related) pair of sorted tuples.
+    The field tree is fixed per class, so it is only walked once.
+    """
+    select, prefetch = set(), set()
+    _collect(serializer_class(), serializer_class.Meta.model, [], False, select, prefetch)
+    return tuple(sorted(select)), tuple(sorted(prefetch))
+
+
+def optimize_queryset(queryset, serializer_class):
+    """
+    Add the joins and prefetches serializer_class needs to queryset.
+    Lookups the queryset already prefetches (e.g. with a custom
+    Prefetch) are left alone.
+    """
+    select, prefetch = related_lookups(serializer_class)
+    existing = {
+        lookup.prefetch_to if isinstance(lookup, Prefetch) else lookup
+        for lookup in queryset._prefetch_related_lookups
+    }
+    prefetch = [lookup for lookup in prefetch if lookup not in existing]
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+
+def _collect(serializer, model, prefix, many, select, prefetch):
+    for field in serializer.fields.values():
+        if field.source == '*':
+            continue
+
+        nested = field
+        if isinstance(field, serializers.ListSerializer):
+            nested = field.child
+        needs_object = isinstance(nested, serializers.BaseSerializer)
+
+        # Walk the relations in the source; stop at the first non-relation
+        # attribute (a column, property or method)
+        attrs = field.source.split('.')
+        if not needs_object:
+            attrs = attrs[:-1]  # e.g. a PK field only needs the FK column
+        path, current_model, path_many = list(prefix), model, many
+        for attr in attrs:
+            try:
+                model_field = current_model._meta.get_field(attr)
+            except FieldDoesNotExist:
+                break
+            if not model_field.is_relation:
+                break
+            path.append(attr)
+            path_many = path_many or model_field.many_to_many or model_field.one_to_many
+            current_model = model_field.related_model
+            (prefetch if path_many else select).add('__'.join(path))
+        else:
+            if needs_object and path != prefix:
+                _collect(nested, current_model, path, path_many, select, prefetch)
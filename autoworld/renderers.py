@@ -0,0 +1,23 @@
+import orjson
+from rest_framework.renderers import JSONRenderer
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSON renderer backed by orjson.
+    Types orjson can't encode natively fall back to DRF's JSON encoder.
+    """
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        # Validation errors on list fields are keyed by integer index
+        option = orjson.OPT_NON_STR_KEYS
+        # orjson only indents by two spaces, whatever width was asked for
+        # (the browsable API and ?format=json; indent=N)
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(
+            data,
+            default=self.encoder_class().default,
+            option=option
+        )
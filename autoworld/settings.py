@@ -52,6 +52,39 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'autoworld.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    # Login runs a deliberately slow password hash; cap attempts per client
+    # IP and per target email before any hashing happens
+    'DEFAULT_THROTTLE_RATES': {
+        'login': '10/min',
+        'login_email': '5/min',
+    },
+    # Render's load balancer is the only proxy in front of gunicorn, so the
+    # client IP is the last X-Forwarded-For entry rather than the whole
+    # (client-controlled) header
+    'NUM_PROXIES': 1,
+}
+
+# Throttle counters live in the database so every gunicorn worker shares
+# them (a per-process cache would multiply the limits by the worker count).
+# They get their own alias, sized so live counters (a minute's worth of
+# attempts) fit while the table stays small: each set() counts every row,
+# and expired keys are only deleted by the cull once MAX_ENTRIES is passed.
+# The table is created by migration users 0005.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'throttle': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'django_cache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+        },
+    },
 }
 
 SIMPLE_JWT = {
@@ -59,6 +92,9 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
+    # Tokens are only verified by this API, so a symmetric HMAC (keyed by
+    # SECRET_KEY) is enough; no per-login RSA signing
+    'ALGORITHM': 'HS256',
     'AUTH_HEADER_TYPES': ('Bearer',),
     'AUTH_HEADER_NAME': 'HTTP_AUTHORIZATION',
 }
@@ -118,6 +154,12 @@ if DATABASE_URL:
             'PORT': tmpPostgres.port or 5432,
             'OPTIONS': db_options,
             'CONN_MAX_AGE': 600,
+            # Check a reused connection is still alive before the request's
+            # first query, instead of failing after the pooler has dropped it
+            'CONN_HEALTH_CHECKS': True,
+            # The pooler runs in transaction mode, where a server-side cursor
+            # can't outlive its transaction
+            'DISABLE_SERVER_SIDE_CURSORS': True,
         }
     }
 else:
@@ -147,6 +189,15 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Argon2 for new hashes: much cheaper per login than PBKDF2's 1M+ iterations
+# while staying memory-hard. Existing PBKDF2 hashes still verify and are
+# rehashed to Argon2 on the user's next successful login.
+PASSWORD_HASHERS = [
+    'autoworld.hashers.TunedArgon2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -0,0 +1,21 @@
+from django.db.models import CharField, Func
+
+
+class ThousandsSeparated(Func):
+    """
+    Round a number to a whole value and format it with comma thousands
+    separators in the database, e.g. 1234567 -> '1,234,567'.
+    Supported on PostgreSQL (to_char) and SQLite (printf).
+    """
+    function = 'to_char'
+    template = "%(function)s(%(expressions)s, 'FM999,999,999,990')"
+    output_field = CharField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # '%' is doubled twice: once for the template, once for the cursor
+        return self.as_sql(
+            compiler,
+            connection,
+            template="printf('%%%%,d', ROUND(%(expressions)s))",
+            **extra_context
+        )
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-15 05:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cars', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['-created_at'], name='cars_car_created_9010ef_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['price'], name='cars_car_price_f6b08b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['year'], name='cars_car_year_fc6735_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['mileage'], name='cars_car_mileage_f4d08e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['availability'], name='cars_car_availab_45ba4a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['seller_type'], name='cars_car_seller__d2d8cb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['fuel_type'], name='cars_car_fuel_ty_ea08fc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['transmission'], name='cars_car_transmi_f8bcfb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['drive'], name='cars_car_drive_4042c0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['category', 'availability', '-created_at'], name='cars_car_categor_a5ae1b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='carimage',
+            index=models.Index(fields=['car', 'is_primary'], name='cars_carima_car_id_4b6ae5_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-15 05:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cars', '0002_car_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='carimage',
+            name='cars_carima_car_id_4b6ae5_idx',
+        ),
+        migrations.AddIndex(
+            model_name='carimage',
+            index=models.Index(condition=models.Q(('is_primary', True)), fields=['car'], name='carimage_primary_idx'),
+        ),
+    ]
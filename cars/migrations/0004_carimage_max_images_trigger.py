@@ -0,0 +1,68 @@
+from django.db import migrations
+
+
+POSTGRES_FORWARD = [
+    """
+    CREATE OR REPLACE FUNCTION cars_carimage_check_max_images() RETURNS trigger AS $$
+    BEGIN
+        -- Lock the parent car so concurrent uploads for it are counted one at a time
+        PERFORM 1 FROM cars_car WHERE id = NEW.car_id FOR UPDATE;
+        IF (SELECT COUNT(*) FROM cars_carimage WHERE car_id = NEW.car_id) >= 10 THEN
+            RAISE EXCEPTION 'Maximum 10 images allowed per car'
+                USING ERRCODE = 'check_violation';
+        END IF;
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql;
+    """,
+    """
+    CREATE TRIGGER cars_carimage_max_images
+    BEFORE INSERT ON cars_carimage
+    FOR EACH ROW EXECUTE FUNCTION cars_carimage_check_max_images();
+    """,
+]
+
+POSTGRES_REVERSE = [
+    "DROP TRIGGER IF EXISTS cars_carimage_max_images ON cars_carimage;",
+    "DROP FUNCTION IF EXISTS cars_carimage_check_max_images();",
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE TRIGGER cars_carimage_max_images
+    BEFORE INSERT ON cars_carimage
+    FOR EACH ROW
+    WHEN (SELECT COUNT(*) FROM cars_carimage WHERE car_id = NEW.car_id) >= 10
+    BEGIN
+        SELECT RAISE(ABORT, 'Maximum 10 images allowed per car');
+    END;
+    """,
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS cars_carimage_max_images;",
+]
+
+
+def _run(schema_editor, statements):
+    for sql in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def create_trigger(apps, schema_editor):
+    _run(schema_editor, {'postgresql': POSTGRES_FORWARD, 'sqlite': SQLITE_FORWARD})
+
+
+def drop_trigger(apps, schema_editor):
+    _run(schema_editor, {'postgresql': POSTGRES_REVERSE, 'sqlite': SQLITE_REVERSE})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cars', '0003_carimage_primary_partial_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigger, drop_trigger),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-15 05:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cars', '0004_carimage_max_images_trigger'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='carimage',
+            index=models.Index(fields=['car', '-is_primary', 'order', 'uploaded_at'], name='carimg_car_display_idx'),
+        ),
+    ]
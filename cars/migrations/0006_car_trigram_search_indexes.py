@@ -0,0 +1,41 @@
+from django.db import migrations
+
+
+# Django compiles icontains on PostgreSQL to UPPER(col) LIKE UPPER('%...%'),
+# so the trigram indexes are built on UPPER(col) to be usable by it.
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm;",
+    "CREATE INDEX IF NOT EXISTS car_title_trgm_idx "
+    "ON cars_car USING gin (UPPER(title) gin_trgm_ops);",
+    "CREATE INDEX IF NOT EXISTS car_loc_trgm_idx "
+    "ON cars_car USING gin (UPPER(location) gin_trgm_ops);",
+]
+
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS car_title_trgm_idx;",
+    "DROP INDEX IF EXISTS car_loc_trgm_idx;",
+]
+
+
+def create_indexes(apps, schema_editor):
+    # Trigram indexes are PostgreSQL-only; SQLite keeps scanning
+    if schema_editor.connection.vendor == 'postgresql':
+        for sql in POSTGRES_FORWARD:
+            schema_editor.execute(sql)
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for sql in POSTGRES_REVERSE:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cars', '0005_carimage_display_order_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
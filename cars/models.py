@@ -1,4 +1,8 @@
+from decimal import ROUND_HALF_UP, Decimal
+from functools import cached_property
+
 from django.db import models
+from django.db.models import Q, Subquery
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
 
@@ -18,6 +22,44 @@ class Category(models.Model):
         return self.name
 
 
+class CarQuerySet(models.QuerySet):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pooled_fields = ()
+
+    def pool_related(self, *fields):
+        """
+        Share one instance per primary key for the given select_related
+        foreign keys, so cars with the same category/user point at the
+        same object instead of each row keeping its own copy.
+        """
+        clone = self._chain()
+        clone._pooled_fields = fields
+        return clone
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._pooled_fields = self._pooled_fields
+        return clone
+
+    def _fetch_all(self):
+        fetched = self._result_cache is not None
+        super()._fetch_all()
+        if not fetched and self._pooled_fields:
+            self._pool_related_instances()
+
+    def _pool_related_instances(self):
+        for name in self._pooled_fields:
+            field = self.model._meta.get_field(name)
+            pool = {}
+            for obj in self._result_cache:
+                if not isinstance(obj, self.model) or not field.is_cached(obj):
+                    continue
+                related = field.get_cached_value(obj)
+                if related is not None:
+                    field.set_cached_value(obj, pool.setdefault(related.pk, related))
+
+
 class Car(models.Model):
     SELLER_TYPE_CHOICES = [
         ('private', 'Private Seller'),
@@ -62,6 +104,14 @@ class Car(models.Model):
         ('reserved', 'Reserved'),
     ]
 
+    # Value -> label lookups for the *_display properties
+    _SELLER_TYPE_LABELS = dict(SELLER_TYPE_CHOICES)
+    _DRIVE_LABELS = dict(DRIVE_CHOICES)
+    _FUEL_TYPE_LABELS = dict(FUEL_TYPE_CHOICES)
+    _TRANSMISSION_LABELS = dict(TRANSMISSION_CHOICES)
+    _ASPIRATION_LABELS = dict(ASPIRATION_CHOICES)
+    _AVAILABILITY_LABELS = dict(AVAILABILITY_CHOICES)
+
     # Basic Information
     title = models.CharField(max_length=255, help_text="e.g., Toyota Land Cruiser V8")
     description = models.TextField()
@@ -160,10 +210,25 @@ class Car(models.Model):
         related_name='cars'
     )
 
+    objects = CarQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Car'
         verbose_name_plural = 'Cars'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at']),
+            models.Index(fields=['price']),
+            models.Index(fields=['year']),
+            models.Index(fields=['mileage']),
+            models.Index(fields=['availability']),
+            models.Index(fields=['seller_type']),
+            models.Index(fields=['fuel_type']),
+            models.Index(fields=['transmission']),
+            models.Index(fields=['drive']),
+            # Browsing a category: filter by category/availability, newest first
+            models.Index(fields=['category', 'availability', '-created_at']),
+        ]
 
     def __str__(self):
         return f"{self.title} ({self.year})"
@@ -173,48 +238,80 @@ class Car(models.Model):
         """Get the primary image for this car"""
         return self.images.filter(is_primary=True).first()
 
-    @property
+    @cached_property
     def image_count(self):
-        """Get total number of images"""
+        """Get total number of images (list views annotate this instead)"""
         return self.images.count()
 
-    @property
+    @cached_property
+    def seller_type_display(self):
+        """Return the seller type label"""
+        return self._SELLER_TYPE_LABELS.get(self.seller_type, self.seller_type)
+
+    @cached_property
+    def drive_display(self):
+        """Return the drive type label"""
+        return self._DRIVE_LABELS.get(self.drive, self.drive)
+
+    @cached_property
+    def fuel_type_display(self):
+        """Return the fuel type label"""
+        return self._FUEL_TYPE_LABELS.get(self.fuel_type, self.fuel_type)
+
+    @cached_property
+    def transmission_display(self):
+        """Return the transmission label"""
+        return self._TRANSMISSION_LABELS.get(self.transmission, self.transmission)
+
+    @cached_property
+    def aspiration_display(self):
+        """Return the aspiration label"""
+        return self._ASPIRATION_LABELS.get(self.aspiration, self.aspiration)
+
+    @cached_property
+    def availability_display(self):
+        """Return the availability label"""
+        return self._AVAILABILITY_LABELS.get(self.availability, self.availability)
+
+    @cached_property
     def formatted_price(self):
         """Return formatted price with KSh"""
-        return f"KSh {self.price:,.0f}"
+        # Round half up like the database does for the list's annotation
+        price = Decimal(self.price).quantize(Decimal('1'), rounding=ROUND_HALF_UP)
+        return f"KSh {price:,}"
 
-    @property
+    @cached_property
     def formatted_mileage(self):
         """Return formatted mileage"""
         return f"{self.mileage:,} KM"
 
-    @property
+    @cached_property
     def formatted_engine_size(self):
         """Return formatted engine size"""
         return f"{self.engine_size} CC"
 
-    @property
+    @cached_property
     def formatted_horse_power(self):
         """Return formatted horse power"""
         if self.horse_power:
             return f"{self.horse_power} Hp"
         return None
 
-    @property
+    @cached_property
     def formatted_torque(self):
         """Return formatted torque"""
         if self.torque:
             return f"{self.torque} Nm"
         return None
 
-    @property
+    @cached_property
     def formatted_acceleration(self):
         """Return formatted acceleration"""
         if self.acceleration:
             return f"{self.acceleration} Secs (0-100 Kph)"
         return None
 
-    @property
+    @cached_property
     def formatted_condition_score(self):
         """Return formatted condition score"""
         if self.condition_score:
@@ -237,46 +334,64 @@ class CarImage(models.Model):
         verbose_name = 'Car Image'
         verbose_name_plural = 'Car Images'
         ordering = ['-is_primary', 'order', 'uploaded_at']
-        unique_together = ['car', 'order']
+        unique_together = ['car', 'order']  # Also serves as the (car, order) index
+        indexes = [
+            # Matches the default ordering, so a car's images come back
+            # from the index already sorted
+            models.Index(
+                fields=['car', '-is_primary', 'order', 'uploaded_at'],
+                name='carimg_car_display_idx'
+            ),
+            # Partial index: one entry per car, only for the primary image
+            models.Index(
+                fields=['car'],
+                condition=Q(is_primary=True),
+                name='carimage_primary_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.car.title} - Image {self.order}"
 
-    def save(self, *args, **kwargs):
-        # If this is the first image, make it primary
-        if not self.pk and not self.car.images.exists():
-            self.is_primary = True
-            self.order = 1
+    def save(self, *args, _current_count=None, **kwargs):
+        # The 10-images-per-car cap is enforced by a database trigger
+        # (see migration 0004), which raises IntegrityError on the 11th insert.
+
+        # Callers that already know the car's image count pass it in as
+        # _current_count to skip the query
+        is_first = False
+        if not self.pk:  # New image
+            if _current_count is not None:
+                is_first = _current_count == 0
+            else:
+                # Only "any images yet?" matters, so stop at the first row
+                is_first = not CarImage.objects.filter(car_id=self.car_id).exists()
+
+            # If this is the first image, make it primary
+            if is_first:
+                self.is_primary = True
+                self.order = 1
         
         # If setting this as primary, unset other primary images
-        if self.is_primary:
+        # (nothing to unset when adding the car's first image)
+        if self.is_primary and not is_first:
             CarImage.objects.filter(
-                car=self.car,
+                car_id=self.car_id,
                 is_primary=True
             ).exclude(pk=self.pk).update(is_primary=False)
         
-        # Enforce maximum 10 images per car
-        if not self.pk:  # New image
-            existing_count = self.car.images.count()
-            if existing_count >= 10:
-                raise ValueError(f"Cannot add more than 10 images per car. Current count: {existing_count}")
-        
         super().save(*args, **kwargs)
 
     def delete(self, *args, **kwargs):
-        # If deleting primary image, promote next image
+        # Only runs for single-image deletes: deleting a Car (or a CarImage
+        # queryset) bypasses this method and, with no signals attached to
+        # CarImage, removes the images in one bulk DELETE.
+
+        # If deleting primary image, promote next image in a single UPDATE
         if self.is_primary:
-            next_image = self.car.images.exclude(pk=self.pk).first()
-            if next_image:
-                next_image.is_primary = True
-                next_image.save()
+            next_image = CarImage.objects.filter(
+                car_id=self.car_id
+            ).exclude(pk=self.pk).values('pk')[:1]
+            CarImage.objects.filter(pk=Subquery(next_image)).update(is_primary=True)
         
         super().delete(*args, **kwargs)
-
-    def clean(self):
-        """Validate that we don't exceed 10 images"""
-        if not self.pk:  # Only for new images
-            existing_count = CarImage.objects.filter(car=self.car).count()
-            if existing_count >= 10:
-                from django.core.exceptions import ValidationError
-                raise ValidationError("A car can have a maximum of 10 images.")
\ No newline at end of file
@@ -0,0 +1,16 @@
+from rest_framework.pagination import CursorPagination
+
+
+class CarCursorPagination(CursorPagination):
+    """
+    Keyset pagination for the car list: each page is a LIMIT query that
+    seeks from the previous page's last row instead of an OFFSET scan
+    """
+    page_size = 25
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = '-created_at'
+
+    def get_ordering(self, request, queryset, view):
+        # Keep whichever ?ordering= the view applied to the queryset
+        return tuple(queryset.query.order_by) or (self.ordering,)
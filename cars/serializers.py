@@ -1,72 +1,83 @@
+from functools import cached_property
+
 from rest_framework import serializers
 from .models import Category, Car, CarImage
 from django.contrib.auth import get_user_model
 from decimal import Decimal
+from datetime import date
 
 User = get_user_model()
 
+_MAX_YEAR_CACHE = {}
+
+
+def _max_year():
+    """Latest accepted manufacturing year (next year), recomputed once a day"""
+    today = date.today()
+    if _MAX_YEAR_CACHE.get('date') != today:
+        _MAX_YEAR_CACHE.update(date=today, year=today.year + 1)
+    return _MAX_YEAR_CACHE['year']
+
 
 class CategorySerializer(serializers.ModelSerializer):
-    car_count = serializers.SerializerMethodField()
+    car_count = serializers.IntegerField(read_only=True)  # Annotated on the queryset
 
     class Meta:
         model = Category
         fields = ['id', 'name', 'description', 'created_at', 'car_count']
         read_only_fields = ['id', 'created_at']
 
-    def get_car_count(self, obj):
-        return obj.cars.count()
-
 
 class CarImageSerializer(serializers.ModelSerializer):
     # Use SerializerMethodField to get the full URL
     image_url = serializers.SerializerMethodField()
+    # Same URL; a plain ImageField would call build_absolute_uri per image
+    image = serializers.SerializerMethodField(method_name='get_image_url')
     
     class Meta:
         model = CarImage
         fields = ['id', 'image_url', 'image', 'is_primary', 'order', 'uploaded_at']
         read_only_fields = ['id', 'uploaded_at']
 
+    @cached_property
+    def _base_url(self):
+        """Scheme and host of the current request, resolved once per serializer"""
+        request = self.context.get('request')
+        if request is not None:
+            return request.build_absolute_uri('/')[:-1]
+        return ''
+
     def get_image_url(self, obj):
         """Get the full URL for the image"""
-        request = self.context.get('request')
         if obj.image:
             # Get the image URL
             image_url = obj.image.url
-            # Build absolute URL if request context is available
-            if request is not None:
-                return request.build_absolute_uri(image_url)
-            return image_url
+            # Remote storages (e.g. Cloudinary) already return absolute URLs
+            if image_url.startswith(('http://', 'https://')):
+                return image_url
+            # Prefix the request host if request context is available
+            return f"{self._base_url}{image_url}"
         return None
 
-    def validate(self, attrs):
-        # Check max 10 images per car
-        if not self.instance:  # Creating new image
-            car = attrs.get('car') or self.context.get('car')
-            if car and car.images.count() >= 10:
-                raise serializers.ValidationError(
-                    "Maximum 10 images allowed per car"
-                )
-        return attrs
-
 
 class CarListSerializer(serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
-    images = CarImageSerializer(many=True, read_only=True)  # IMPORTANT: Include images
+    # IMPORTANT: Include images (prefetched by the list view, primary first)
+    images = CarImageSerializer(source='prefetched_images', many=True, read_only=True)
     primary_image = serializers.SerializerMethodField()
     created_by_name = serializers.CharField(source='created_by.full_name', read_only=True)
-    image_count = serializers.SerializerMethodField()
+    image_count = serializers.IntegerField(read_only=True)  # Annotated on the queryset
     
     # Formatted fields
-    formatted_price = serializers.SerializerMethodField()
-    formatted_mileage = serializers.SerializerMethodField()
-    seller_type_display = serializers.CharField(source='get_seller_type_display', read_only=True)
-    availability_display = serializers.CharField(source='get_availability_display', read_only=True)
+    formatted_price = serializers.ReadOnlyField()
+    formatted_mileage = serializers.ReadOnlyField()
+    seller_type_display = serializers.ReadOnlyField()
+    availability_display = serializers.ReadOnlyField()
 
     class Meta:
         model = Car
         fields = [
-            'id', 'title', 'description', 'price', 'formatted_price', 'category', 'category_name',
+            'id', 'title', 'price', 'formatted_price', 'category', 'category_name',
             'seller_type', 'seller_type_display', 'condition_score', 
             'year', 'location', 'availability',
             'availability_display', 'mileage', 'formatted_mileage', 'fuel_type',
@@ -75,20 +86,13 @@ class CarListSerializer(serializers.ModelSerializer):
         ]
 
     def get_primary_image(self, obj):
-        primary = obj.primary_image
-        if primary:
-            serializer = CarImageSerializer(primary, context=self.context)
-            return serializer.data
+        # The prefetched images are ordered primary first
+        images = obj.prefetched_images
+        if images and images[0].is_primary:
+            primary = images[0]
+            # Reuse the nested images serializer so its cached base URL is shared
+            return self.fields['images'].child.to_representation(primary)
         return None
-    
-    def get_image_count(self, obj):
-        return obj.images.count()
-    
-    def get_formatted_price(self, obj):
-        return f"KSh {obj.price:,.0f}"
-    
-    def get_formatted_mileage(self, obj):
-        return f"{obj.mileage:,} KM"
 
 
 class CarDetailSerializer(serializers.ModelSerializer):
@@ -98,21 +102,21 @@ class CarDetailSerializer(serializers.ModelSerializer):
     created_by_email = serializers.CharField(source='created_by.email', read_only=True)
     
     # Formatted fields
-    formatted_price = serializers.SerializerMethodField()
-    formatted_mileage = serializers.SerializerMethodField()
-    formatted_engine_size = serializers.SerializerMethodField()
-    formatted_horse_power = serializers.SerializerMethodField()
-    formatted_torque = serializers.SerializerMethodField()
-    formatted_acceleration = serializers.SerializerMethodField()
-    formatted_condition_score = serializers.SerializerMethodField()
+    formatted_price = serializers.ReadOnlyField()
+    formatted_mileage = serializers.ReadOnlyField()
+    formatted_engine_size = serializers.ReadOnlyField()
+    formatted_horse_power = serializers.ReadOnlyField()
+    formatted_torque = serializers.ReadOnlyField()
+    formatted_acceleration = serializers.ReadOnlyField()
+    formatted_condition_score = serializers.ReadOnlyField()
     
     # Display names for choices
-    seller_type_display = serializers.CharField(source='get_seller_type_display', read_only=True)
-    drive_display = serializers.CharField(source='get_drive_display', read_only=True)
-    fuel_type_display = serializers.CharField(source='get_fuel_type_display', read_only=True)
-    transmission_display = serializers.CharField(source='get_transmission_display', read_only=True)
-    aspiration_display = serializers.CharField(source='get_aspiration_display', read_only=True)
-    availability_display = serializers.CharField(source='get_availability_display', read_only=True)
+    seller_type_display = serializers.ReadOnlyField()
+    drive_display = serializers.ReadOnlyField()
+    fuel_type_display = serializers.ReadOnlyField()
+    transmission_display = serializers.ReadOnlyField()
+    aspiration_display = serializers.ReadOnlyField()
+    availability_display = serializers.ReadOnlyField()
 
     class Meta:
         model = Car
@@ -130,35 +134,6 @@ class CarDetailSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_by', 'created_at', 'updated_at']
 
-    def get_formatted_price(self, obj):
-        return f"KSh {obj.price:,.0f}"
-    
-    def get_formatted_mileage(self, obj):
-        return f"{obj.mileage:,} KM"
-    
-    def get_formatted_engine_size(self, obj):
-        return f"{obj.engine_size} CC"
-    
-    def get_formatted_horse_power(self, obj):
-        if obj.horse_power:
-            return f"{obj.horse_power} Hp"
-        return None
-    
-    def get_formatted_torque(self, obj):
-        if obj.torque:
-            return f"{obj.torque} Nm"
-        return None
-    
-    def get_formatted_acceleration(self, obj):
-        if obj.acceleration:
-            return f"{obj.acceleration} Secs (0-100 Kph)"
-        return None
-    
-    def get_formatted_condition_score(self, obj):
-        if obj.condition_score:
-            return f"{obj.condition_score}/5"
-        return None
-
 
 class CarCreateUpdateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -171,22 +146,16 @@ class CarCreateUpdateSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id']
 
-    def validate_category(self, value):
-        if not Category.objects.filter(id=value.id).exists():
-            raise serializers.ValidationError("Invalid category")
-        return value
-    
     def validate_price(self, value):
         if value < Decimal('0'):
             raise serializers.ValidationError("Price cannot be negative")
         return value
     
     def validate_year(self, value):
-        from datetime import datetime
-        current_year = datetime.now().year
-        if value < 1900 or value > current_year + 1:
+        max_year = _max_year()
+        if value < 1900 or value > max_year:
             raise serializers.ValidationError(
-                f"Year must be between 1900 and {current_year + 1}"
+                f"Year must be between 1900 and {max_year}"
             )
         return value
     
@@ -236,25 +205,27 @@ class ImageUploadSerializer(serializers.ModelSerializer):
         return attrs
 
 
+class ImageOrderItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    order = serializers.IntegerField(min_value=0)
+
+
 class ImageReorderSerializer(serializers.Serializer):
-    image_orders = serializers.ListField(
-        child=serializers.DictField(
-            child=serializers.IntegerField()
-        ),
+    image_orders = ImageOrderItemSerializer(
+        many=True,
         help_text="List of {'id': image_id, 'order': new_order}"
     )
 
     def validate_image_orders(self, value):
         if not value:
             raise serializers.ValidationError("image_orders cannot be empty")
-        
-        # Validate structure
-        for item in value:
-            if 'id' not in item or 'order' not in item:
-                raise serializers.ValidationError(
-                    "Each item must have 'id' and 'order' keys"
-                )
-        
+        # Catch conflicting entries here, before the view touches the database
+        ids = [item['id'] for item in value]
+        if len(set(ids)) != len(ids):
+            raise serializers.ValidationError("Each image id can only appear once")
+        orders = [item['order'] for item in value]
+        if len(set(orders)) != len(orders):
+            raise serializers.ValidationError("Each order value can only be used once")
         return value
 
 
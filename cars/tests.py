@@ -1,3 +1,263 @@
-from django.test import TestCase
+import io
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import orjson
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, transaction
+from django.test import override_settings
+from PIL import Image
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from autoworld.prefetch import related_lookups
+from users.models import User
+from .models import Car, CarImage, Category
+from .serializers import CarDetailSerializer, CarImageSerializer
+
+
+def _image_upload(name='car.png'):
+    buffer = io.BytesIO()
+    Image.new('RGB', (2, 2)).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+class CarTestCase(APITestCase):
+    """Admin client, a category and a scratch MEDIA_ROOT for uploads"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            'admin@example.com', 'pw123456XX', first_name='A', last_name='B'
+        )
+        cls.category = Category.objects.create(name='SUV')
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.client.force_authenticate(self.admin)
+
+    def make_car(self, **fields):
+        values = dict(
+            title='Land Cruiser', description='d', price=Decimal('1000000'),
+            category=self.category, year=2020, location='Nairobi', drive='4wd',
+            mileage=12000, engine_size=2000, fuel_type='petrol',
+            transmission='automatic', created_by=self.admin,
+        )
+        values.update(fields)
+        return Car.objects.create(**values)
+
+    def add_images(self, car, count, first_order=1):
+        CarImage.objects.bulk_create(
+            CarImage(car=car, image=f'cars/{car.pk}-{n}.png', order=n, is_primary=n == first_order)
+            for n in range(first_order, first_order + count)
+        )
+
+    def stored_files(self):
+        return [name for _, _, names in os.walk(self.media_root) for name in names]
+
+
+class MaxImagesTests(CarTestCase):
+
+    def test_trigger_rejects_eleventh_image(self):
+        car = self.make_car()
+        self.add_images(car, 10)
+        with self.assertRaisesMessage(IntegrityError, 'Maximum 10 images allowed per car'):
+            with transaction.atomic():
+                CarImage.objects.create(car=car, image='cars/extra.png', order=11)
+
+    def test_upload_rejected_by_trigger_returns_400(self):
+        car = self.make_car()
+        self.add_images(car, 10)
+        # A concurrent upload landed between the count and the insert
+        with mock.patch('cars.views._car_image_count', return_value=9):
+            response = self.client.post(
+                f'/cars/{car.pk}/images/', {'image': _image_upload(), 'order': 11},
+                format='multipart'
+            )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'error': 'Maximum 10 images allowed per car'})
+        self.assertEqual(car.images.count(), 10)
+        self.assertEqual(self.stored_files(), [])
+
+    def test_bulk_upload_rejected_by_trigger_returns_400(self):
+        car = self.make_car()
+        # Out of the way of the orders the stale count hands out (9 and 10)
+        self.add_images(car, 9, first_order=20)
+        with mock.patch('cars.views._car_image_count', return_value=8):
+            response = self.client.post(
+                f'/cars/{car.pk}/images/bulk/',
+                {'images': [_image_upload('a.png'), _image_upload('b.png')]},
+                format='multipart'
+            )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(car.images.count(), 9)
+        self.assertEqual(self.stored_files(), [])
+
+    def test_upload_at_cap_fails_fast(self):
+        car = self.make_car()
+        self.add_images(car, 10)
+        response = self.client.post(
+            f'/cars/{car.pk}/images/', {'image': _image_upload()}, format='multipart'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.stored_files(), [])
+
+
+class ImageReorderTests(CarTestCase):
+
+    def test_swap_orders(self):
+        car = self.make_car()
+        self.add_images(car, 3)
+        first, second, third = car.images.order_by('order')
+        response = self.client.patch(
+            f'/cars/{car.pk}/images/reorder/',
+            {'image_orders': [{'id': first.pk, 'order': 2}, {'id': second.pk, 'order': 1}]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            dict(car.images.values_list('id', 'order')),
+            {first.pk: 2, second.pk: 1, third.pk: 3}
+        )
+
+    def test_order_held_by_other_image_returns_400(self):
+        car = self.make_car()
+        self.add_images(car, 3)
+        first, second, third = car.images.order_by('order')
+        response = self.client.patch(
+            f'/cars/{car.pk}/images/reorder/',
+            {'image_orders': [{'id': first.pk, 'order': 3}]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            dict(car.images.values_list('id', 'order')),
+            {first.pk: 1, second.pk: 2, third.pk: 3}
+        )
+
+
+class CarListPaginationTests(CarTestCase):
+
+    def test_cursor_follows_requested_ordering(self):
+        for price in ['300', '100', '500', '200', '400']:
+            self.make_car(price=Decimal(price))
+
+        prices = []
+        url = '/cars/?ordering=price&page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            prices += [row['price'] for row in response.data['results']]
+            url = response.data['next']
+
+        self.assertEqual(prices, ['100.00', '200.00', '300.00', '400.00', '500.00'])
+
+    def test_unknown_ordering_falls_back_to_newest_first(self):
+        cars = [self.make_car(title=f'Car {n}') for n in range(3)]
+        response = self.client.get('/cars/?ordering=password')
+        self.assertEqual(
+            [row['id'] for row in response.data['results']],
+            [car.pk for car in reversed(cars)]
+        )
+
+
+class CarImageSerializerTests(CarTestCase):
+
+    def test_image_urls_resolve_request_host_once(self):
+        car = self.make_car()
+        self.add_images(car, 3)
+        request = APIRequestFactory().get('/cars/')
+        with mock.patch.object(
+            request, 'build_absolute_uri', wraps=request.build_absolute_uri
+        ) as build_absolute_uri:
+            data = CarImageSerializer(
+                car.images.all(), many=True, context={'request': request}
+            ).data
+        self.assertEqual(build_absolute_uri.call_count, 1)
+        for row in data:
+            self.assertTrue(row['image'].startswith('http://testserver/media/cars/'))
+            self.assertEqual(row['image'], row['image_url'])
+
+
+class PoolRelatedTests(CarTestCase):
+
+    def pooled(self):
+        return Car.objects.select_related('category', 'created_by').pool_related(
+            'category', 'created_by'
+        )
+
+    def test_rows_share_related_instances(self):
+        self.make_car()
+        self.make_car()
+        first, second = self.pooled()
+        self.assertIs(first.category, second.category)
+        self.assertIs(first.created_by, second.created_by)
+
+    def test_chained_clones_keep_pooling(self):
+        self.make_car(year=2019)
+        self.make_car(year=2020)
+        self.make_car(year=2021)
+        queryset = self.pooled().filter(year__gte=2020).order_by('year').prefetch_related('images')
+        first, second = queryset
+        self.assertIs(first.category, second.category)
+        self.assertEqual([first.year, second.year], [2020, 2021])
+
+    def test_count_and_iterator(self):
+        self.make_car()
+        self.make_car()
+        queryset = self.pooled()
+        self.assertEqual(queryset.count(), 2)
+        cars = list(queryset.iterator())
+        self.assertEqual(len(cars), 2)
+        self.assertEqual(cars[0].category, self.category)
+        # Evaluating after iterator() still fetches and pools the rows
+        first, second = queryset
+        self.assertIs(first.category, second.category)
+
+
+class JSONRendererTests(CarTestCase):
+
+    def test_compact_by_default(self):
+        response = self.client.get('/cars/categories/')
+        self.assertIn(b'"name":"SUV"', response.content)
+        self.assertNotIn(b'\n', response.content)
+
+    def test_indent_requested_in_accept_header(self):
+        response = self.client.get(
+            '/cars/categories/', HTTP_ACCEPT='application/json; indent=4'
+        )
+        self.assertTrue(response.content.startswith(b'[\n  {\n    "id": '))
+
+
+class CarExportTests(CarTestCase):
+
+    def test_timestamps_match_the_api(self):
+        car = self.make_car()
+        response = self.client.get('/cars/export/')
+        rows = orjson.loads(b''.join(response.streaming_content))
+        detail = self.client.get(f'/cars/{car.pk}/').data
+        self.assertEqual(rows[0]['created_at'], detail['created_at'])
+        self.assertEqual(rows[0]['updated_at'], detail['updated_at'])
+
+
+class RelatedLookupsTests(CarTestCase):
+
+    def test_lookups_derived_once_per_serializer(self):
+        lookups = related_lookups(CarDetailSerializer)
+        self.assertEqual(lookups, (('category', 'created_by'), ('images',)))
+        self.assertIs(related_lookups(CarDetailSerializer), lookups)
+
+    def test_detail_get_joins_and_prefetches(self):
+        car = self.make_car()
+        self.add_images(car, 2)
+        # The car with its joins, then its images
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/cars/{car.pk}/')
+        self.assertEqual(response.data['category_name'], 'SUV')
+        self.assertEqual(len(response.data['images']), 2)
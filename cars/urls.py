@@ -7,6 +7,7 @@ from .views import (
     # Car views
     CarListCreateView,
     CarDetailView,
+    CarExportView,
     
     # Choices views
     SellerTypeChoicesView,
@@ -33,6 +34,7 @@ urlpatterns = [
   
     path('', CarListCreateView.as_view(), name='car-list-create'),
     path('<int:pk>/', CarDetailView.as_view(), name='car-detail'),
+    path('export/', CarExportView.as_view(), name='car-export'),
    
     path('choices/seller-types/', SellerTypeChoicesView.as_view(), name='seller-type-choices'),
     path('choices/drives/', DriveChoicesView.as_view(), name='drive-choices'),
@@ -1,10 +1,17 @@
+import orjson
 from rest_framework import generics, status, views
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
+from django.db import IntegrityError, transaction
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from django.db import transaction
+from django.utils.cache import patch_cache_control
+from django.db.models import BooleanField, Case, Count, F, Max, Prefetch, Q, Value, When
+from django.db.models.functions import Concat
 
 from .models import Category, Car, CarImage
+from .functions import ThousandsSeparated
+from .pagination import CarCursorPagination
 from .serializers import (
     CategorySerializer,
     CarListSerializer,
@@ -15,7 +22,9 @@ from .serializers import (
     ImageReorderSerializer,
     ChoicesSerializer
 )
-from users.permissions import IsApprovedWorkerOrAdmin
+from users.permissions import IsAdmin, IsApprovedWorkerOrAdmin
+from autoworld.export import format_datetimes, keyset_batches
+from autoworld.prefetch import optimize_queryset
 
 
 # ============= Category Views =============
@@ -25,7 +34,7 @@ class CategoryListCreateView(generics.ListCreateAPIView):
     GET: List all categories
     POST: Create new category (Workers + Admin)
     """
-    queryset = Category.objects.all()
+    queryset = Category.objects.annotate(car_count=Count('cars'))
     serializer_class = CategorySerializer
     permission_classes = [IsApprovedWorkerOrAdmin]
 
@@ -34,6 +43,10 @@ class CategoryListCreateView(generics.ListCreateAPIView):
             return []  # Allow anyone to view categories
         return super().get_permissions()
 
+    def perform_create(self, serializer):
+        category = serializer.save()
+        category.car_count = 0  # New categories have no cars yet
+
 
 class CategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
     """
@@ -41,7 +54,7 @@ class CategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
     PUT/PATCH: Update category
     DELETE: Delete category
     """
-    queryset = Category.objects.all()
+    queryset = Category.objects.annotate(car_count=Count('cars'))
     serializer_class = CategorySerializer
     permission_classes = [IsApprovedWorkerOrAdmin]
 
@@ -53,87 +66,75 @@ class CategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 # ============= Car Views =============
 
+_ALLOWED_ORDERINGS = frozenset({
+    'price', '-price', 'year', '-year', 'mileage', '-mileage',
+    'created_at', '-created_at', 'title', '-title'
+})
+
+
 class CarListCreateView(generics.ListCreateAPIView):
     """
-    GET: List all cars with filtering
+    GET: List all cars with filtering (paginated, 25 per page)
     POST: Create new car (Workers + Admin)
     """
     permission_classes = [IsApprovedWorkerOrAdmin]
+    pagination_class = CarCursorPagination
+
+    # Query parameter -> ORM lookup
+    filter_lookups = {
+        'category': 'category_id',
+        'location': 'location__icontains',
+        'search': 'title__icontains',
+        'min_price': 'price__gte',
+        'max_price': 'price__lte',
+        'min_year': 'year__gte',
+        'max_year': 'year__lte',
+        'min_mileage': 'mileage__gte',
+        'max_mileage': 'mileage__lte',
+        'seller_type': 'seller_type',
+        'fuel_type': 'fuel_type',
+        'transmission': 'transmission',
+        'drive': 'drive',
+        'availability': 'availability',
+    }
 
     def get_queryset(self):
-        queryset = Car.objects.select_related('category', 'created_by').prefetch_related('images')
-        
-        # Filter by category
-        category_id = self.request.query_params.get('category')
-        if category_id:
-            queryset = queryset.filter(category_id=category_id)
-        
-        # Filter by location
-        location = self.request.query_params.get('location')
-        if location:
-            queryset = queryset.filter(location__icontains=location)
-        
-        # Search by title
-        search = self.request.query_params.get('search')
-        if search:
-            queryset = queryset.filter(title__icontains=search)
-        
-        # Filter by price range
-        min_price = self.request.query_params.get('min_price')
-        max_price = self.request.query_params.get('max_price')
-        if min_price:
-            queryset = queryset.filter(price__gte=min_price)
-        if max_price:
-            queryset = queryset.filter(price__lte=max_price)
-        
-        # Filter by year range
-        min_year = self.request.query_params.get('min_year')
-        max_year = self.request.query_params.get('max_year')
-        if min_year:
-            queryset = queryset.filter(year__gte=min_year)
-        if max_year:
-            queryset = queryset.filter(year__lte=max_year)
-        
-        # Filter by mileage range
-        min_mileage = self.request.query_params.get('min_mileage')
-        max_mileage = self.request.query_params.get('max_mileage')
-        if min_mileage:
-            queryset = queryset.filter(mileage__gte=min_mileage)
-        if max_mileage:
-            queryset = queryset.filter(mileage__lte=max_mileage)
-        
-        # Filter by seller type
-        seller_type = self.request.query_params.get('seller_type')
-        if seller_type:
-            queryset = queryset.filter(seller_type=seller_type)
-        
-        # Filter by fuel type
-        fuel_type = self.request.query_params.get('fuel_type')
-        if fuel_type:
-            queryset = queryset.filter(fuel_type=fuel_type)
-        
-        # Filter by transmission
-        transmission = self.request.query_params.get('transmission')
-        if transmission:
-            queryset = queryset.filter(transmission=transmission)
-        
-        # Filter by drive type
-        drive = self.request.query_params.get('drive')
-        if drive:
-            queryset = queryset.filter(drive=drive)
+        queryset = Car.objects.pool_related('category', 'created_by').prefetch_related(
+            Prefetch(
+                'images',
+                queryset=CarImage.objects.order_by('-is_primary', 'order', 'uploaded_at'),
+                # A plain list, so the serializer doesn't clone a queryset per car
+                to_attr='prefetched_images'
+            )
+        )
+        # Joins/prefetches for the remaining related fields come from the serializer
+        queryset = optimize_queryset(queryset, self.get_serializer_class()).annotate(
+            image_count=Count('images'),
+            # Formatted in the database instead of per row in Python
+            formatted_price=Concat(Value('KSh '), ThousandsSeparated('price')),
+            formatted_mileage=Concat(ThousandsSeparated('mileage'), Value(' KM')),
+        ).only(
+            # Only the columns CarListSerializer reads; skips the description text
+            'id', 'title', 'price', 'seller_type', 'condition_score', 'year',
+            'location', 'availability', 'mileage', 'fuel_type', 'transmission',
+            'drive', 'created_at', 'updated_at',
+            'category__id', 'category__name',
+            'created_by__id', 'created_by__first_name', 'created_by__last_name',
+        )
         
-        # Filter by availability
-        availability = self.request.query_params.get('availability')
-        if availability:
-            queryset = queryset.filter(availability=availability)
+        # Apply every filter present in the query string in one filter() call
+        params = self.request.query_params
+        filters = {
+            lookup: value
+            for param, lookup in self.filter_lookups.items()
+            if (value := params.get(param))
+        }
+        if filters:
+            queryset = queryset.filter(**filters)
         
         # Sorting
         ordering = self.request.query_params.get('ordering', '-created_at')
-        allowed_orderings = [
-            'price', '-price', 'year', '-year', 'mileage', '-mileage',
-            'created_at', '-created_at', 'title', '-title'
-        ]
-        if ordering in allowed_orderings:
+        if ordering in _ALLOWED_ORDERINGS:
             queryset = queryset.order_by(ordering)
         
         return queryset
@@ -158,9 +159,20 @@ class CarDetailView(generics.RetrieveUpdateDestroyAPIView):
     PUT/PATCH: Update car
     DELETE: Delete car
     """
-    queryset = Car.objects.select_related('category', 'created_by').prefetch_related('images')
     permission_classes = [IsApprovedWorkerOrAdmin]
 
+    def get_queryset(self):
+        if self.request.method != 'GET':
+            # Updates and deletes only need the Car row itself
+            return Car.objects.all()
+        # The whole Car row, but only the category/user columns
+        # CarDetailSerializer reads (skips the password hash etc.)
+        return optimize_queryset(Car.objects.all(), CarDetailSerializer).only(
+            *(field.name for field in Car._meta.concrete_fields),
+            'category__name',
+            'created_by__first_name', 'created_by__last_name', 'created_by__email',
+        )
+
     def get_serializer_class(self):
         if self.request.method in ['PUT', 'PATCH']:
             return CarCreateUpdateSerializer
@@ -172,88 +184,145 @@ class CarDetailView(generics.RetrieveUpdateDestroyAPIView):
         return super().get_permissions()
 
 
+# ============= Export Views =============
+
+_EXPORT_FIELDS = (
+    'id', 'title', 'price', 'seller_type', 'condition_score',
+    'year', 'location', 'availability', 'drive', 'mileage', 'engine_size',
+    'fuel_type', 'horse_power', 'transmission', 'torque', 'aspiration',
+    'acceleration', 'created_at', 'updated_at',
+)
+_EXPORT_BATCH_SIZE = 2000
+
+
+def _export_batches():
+    """Yield cars as lists of dicts, _EXPORT_BATCH_SIZE rows at a time"""
+    batches = keyset_batches(
+        Car.objects.values(*_EXPORT_FIELDS, category_name=F('category__name')),
+        _EXPORT_BATCH_SIZE
+    )
+    return format_datetimes(batches, ('created_at', 'updated_at'))
+
+
+def _stream_json_array(batches):
+    """Encode batches of rows as one JSON array, a batch per chunk"""
+    yield b'['
+    separator = b''
+    for batch in batches:
+        # Decimals are exported as strings, as the API serializers do
+        yield separator + b','.join(orjson.dumps(row, default=str) for row in batch)
+        separator = b','
+    yield b']'
+
+
+class CarExportView(views.APIView):
+    """
+    GET: Export all cars as a streamed JSON array (Admin only)
+    """
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        response = StreamingHttpResponse(
+            _stream_json_array(_export_batches()),
+            content_type='application/json'
+        )
+        response['Content-Disposition'] = 'attachment; filename="cars.json"'
+        return response
+
+
 # ============= Choices Views =============
 
-class SellerTypeChoicesView(views.APIView):
-    """GET: Get available seller type choices"""
+def _choices_payload(choices):
+    """Serialize a static choices list to JSON bytes once, at import time"""
+    serializer = ChoicesSerializer(
+        [{'value': value, 'label': label} for value, label in choices],
+        many=True
+    )
+    return orjson.dumps(serializer.data)
+
+
+class BaseChoicesView(views.APIView):
+    """GET: Return a pre-encoded choices list"""
+    authentication_classes = []  # Static data, no need to decode tokens
     permission_classes = []  # Public endpoint
+    payload = b'[]'
     
     def get(self, request):
-        choices = [
-            {'value': choice[0], 'label': choice[1]}
-            for choice in Car.SELLER_TYPE_CHOICES
-        ]
-        serializer = ChoicesSerializer(choices, many=True)
-        return Response(serializer.data)
+        response = HttpResponse(self.payload, content_type='application/json')
+        patch_cache_control(response, public=True, max_age=60 * 60 * 24)
+        return response
+
+
+class SellerTypeChoicesView(BaseChoicesView):
+    """GET: Get available seller type choices"""
+    payload = _choices_payload(Car.SELLER_TYPE_CHOICES)
 
 
-class DriveChoicesView(views.APIView):
+class DriveChoicesView(BaseChoicesView):
     """GET: Get available drive type choices"""
-    permission_classes = []  # Public endpoint
-    
-    def get(self, request):
-        choices = [
-            {'value': choice[0], 'label': choice[1]}
-            for choice in Car.DRIVE_CHOICES
-        ]
-        serializer = ChoicesSerializer(choices, many=True)
-        return Response(serializer.data)
+    payload = _choices_payload(Car.DRIVE_CHOICES)
 
 
-class FuelTypeChoicesView(views.APIView):
+class FuelTypeChoicesView(BaseChoicesView):
     """GET: Get available fuel type choices"""
-    permission_classes = []  # Public endpoint
-    
-    def get(self, request):
-        choices = [
-            {'value': choice[0], 'label': choice[1]}
-            for choice in Car.FUEL_TYPE_CHOICES
-        ]
-        serializer = ChoicesSerializer(choices, many=True)
-        return Response(serializer.data)
+    payload = _choices_payload(Car.FUEL_TYPE_CHOICES)
 
 
-class TransmissionChoicesView(views.APIView):
+class TransmissionChoicesView(BaseChoicesView):
     """GET: Get available transmission choices"""
-    permission_classes = []  # Public endpoint
-    
-    def get(self, request):
-        choices = [
-            {'value': choice[0], 'label': choice[1]}
-            for choice in Car.TRANSMISSION_CHOICES
-        ]
-        serializer = ChoicesSerializer(choices, many=True)
-        return Response(serializer.data)
+    payload = _choices_payload(Car.TRANSMISSION_CHOICES)
 
 
-class AspirationChoicesView(views.APIView):
+class AspirationChoicesView(BaseChoicesView):
     """GET: Get available aspiration choices"""
-    permission_classes = []  # Public endpoint
-    
-    def get(self, request):
-        choices = [
-            {'value': choice[0], 'label': choice[1]}
-            for choice in Car.ASPIRATION_CHOICES
-        ]
-        serializer = ChoicesSerializer(choices, many=True)
-        return Response(serializer.data)
+    payload = _choices_payload(Car.ASPIRATION_CHOICES)
 
 
-class AvailabilityChoicesView(views.APIView):
+class AvailabilityChoicesView(BaseChoicesView):
     """GET: Get available availability status choices"""
-    permission_classes = []  # Public endpoint
-    
-    def get(self, request):
-        choices = [
-            {'value': choice[0], 'label': choice[1]}
-            for choice in Car.AVAILABILITY_CHOICES
-        ]
-        serializer = ChoicesSerializer(choices, many=True)
-        return Response(serializer.data)
+    payload = _choices_payload(Car.AVAILABILITY_CHOICES)
 
 
 # ============= Car Image Views =============
 
+# Raised by the max-images trigger (see migration 0004)
+_IMAGE_CAP_MESSAGE = "Maximum 10 images allowed per car"
+
+
+def _car_image_count(car_id):
+    """Check the car exists and count its images in a single query"""
+    count = Car.objects.filter(id=car_id).annotate(
+        image_count=Count('images')
+    ).values_list('image_count', flat=True).first()
+    if count is None:
+        raise Http404("No Car matches the given query.")
+    return count
+
+
+def _is_image_cap_error(exc):
+    return _IMAGE_CAP_MESSAGE in str(exc)
+
+
+def _store_image_files(car_images, image_files):
+    """
+    Write the uploaded files to storage before the rows are inserted, so
+    the insert's transaction isn't held open across slow (remote) uploads
+    """
+    try:
+        for car_image, image_file in zip(car_images, image_files):
+            car_image.image.save(image_file.name, image_file, save=False)
+    except Exception:
+        # Don't leave the files stored before the failure behind
+        _delete_image_files(car_images)
+        raise
+
+
+def _delete_image_files(car_images):
+    """Remove stored files whose rows were never inserted"""
+    for car_image in car_images:
+        car_image.image.delete(save=False)
+
+
 class CarImageUploadView(views.APIView):
     """
     POST: Upload image(s) to a car (max 10 total)
@@ -262,13 +331,12 @@ class CarImageUploadView(views.APIView):
     parser_classes = [MultiPartParser, FormParser]
 
     def post(self, request, car_id):
-        car = get_object_or_404(Car, id=car_id)
-        
-        # Check current image count
-        current_count = car.images.count()
+        current_count = _car_image_count(car_id)
+        # Fail fast before the file is written; the database trigger
+        # still enforces the cap for concurrent uploads
         if current_count >= 10:
             return Response(
-                {"error": "Maximum 10 images allowed per car"},
+                {"error": _IMAGE_CAP_MESSAGE},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
@@ -285,12 +353,23 @@ class CarImageUploadView(views.APIView):
         # Create image
         is_primary = current_count == 0  # First image is primary
         
-        car_image = CarImage.objects.create(
-            car=car,
-            image=image_file,
+        car_image = CarImage(
+            car_id=car_id,
             is_primary=is_primary,
             order=order
         )
+        _store_image_files([car_image], [image_file])
+        try:
+            with transaction.atomic():
+                car_image.save(_current_count=current_count)
+        except Exception as exc:
+            _delete_image_files([car_image])
+            if not (isinstance(exc, IntegrityError) and _is_image_cap_error(exc)):
+                raise
+            return Response(
+                {"error": _IMAGE_CAP_MESSAGE},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
         serializer = CarImageSerializer(car_image, context={'request': request})
         return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -304,7 +383,7 @@ class CarImageBulkUploadView(views.APIView):
     parser_classes = [MultiPartParser, FormParser]
 
     def post(self, request, car_id):
-        car = get_object_or_404(Car, id=car_id)
+        current_count = _car_image_count(car_id)
         
         # Get all uploaded files
         images = request.FILES.getlist('images')
@@ -315,7 +394,6 @@ class CarImageBulkUploadView(views.APIView):
             )
         
         # Check total count doesn't exceed 10
-        current_count = car.images.count()
         total_count = current_count + len(images)
         
         if total_count > 10:
@@ -324,20 +402,29 @@ class CarImageBulkUploadView(views.APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Create images
-        created_images = []
-        with transaction.atomic():
-            for idx, image_file in enumerate(images):
-                is_primary = current_count == 0 and idx == 0  # First image is primary
-                order = current_count + idx + 1
-                
-                car_image = CarImage.objects.create(
-                    car=car,
-                    image=image_file,
-                    is_primary=is_primary,
-                    order=order
-                )
-                created_images.append(car_image)
+        new_images = [
+            CarImage(
+                car_id=car_id,
+                is_primary=current_count == 0 and idx == 0,  # First image is primary
+                order=current_count + idx + 1
+            )
+            for idx in range(len(images))
+        ]
+        _store_image_files(new_images, images)
+        
+        # Create all images with a single INSERT
+        try:
+            with transaction.atomic():
+                created_images = CarImage.objects.bulk_create(new_images)
+        except Exception as exc:
+            _delete_image_files(new_images)
+            # Another upload for this car got in between the count and the insert
+            if not (isinstance(exc, IntegrityError) and _is_image_cap_error(exc)):
+                raise
+            return Response(
+                {"error": _IMAGE_CAP_MESSAGE},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
         serializer = CarImageSerializer(created_images, many=True, context={'request': request})
         return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -352,8 +439,7 @@ class CarImageDetailView(views.APIView):
     parser_classes = [MultiPartParser, FormParser]
 
     def patch(self, request, car_id, image_id):
-        car = get_object_or_404(Car, id=car_id)
-        image = get_object_or_404(CarImage, id=image_id, car=car)
+        image = get_object_or_404(CarImage, id=image_id, car_id=car_id)
         
         # Update image file if provided
         new_image = request.FILES.get('image')
@@ -368,8 +454,7 @@ class CarImageDetailView(views.APIView):
         return Response(serializer.data)
 
     def delete(self, request, car_id, image_id):
-        car = get_object_or_404(Car, id=car_id)
-        image = get_object_or_404(CarImage, id=image_id, car=car)
+        image = get_object_or_404(CarImage, id=image_id, car_id=car_id)
         
         # Delete will auto-promote next image if this was primary
         image.delete()
@@ -387,18 +472,20 @@ class CarImageSetPrimaryView(views.APIView):
     permission_classes = [IsApprovedWorkerOrAdmin]
 
     def patch(self, request, car_id, image_id):
-        car = get_object_or_404(Car, id=car_id)
-        image = get_object_or_404(CarImage, id=image_id, car=car)
+        image = get_object_or_404(CarImage, id=image_id, car_id=car_id)
         
-        # Unset current primary
+        # Unset the current primary and set the new one in a single UPDATE
         CarImage.objects.filter(
-            car=car,
-            is_primary=True
-        ).update(is_primary=False)
-        
-        # Set new primary
+            Q(is_primary=True) | Q(id=image_id),
+            car_id=car_id
+        ).update(
+            is_primary=Case(
+                When(id=image_id, then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField()
+            )
+        )
         image.is_primary = True
-        image.save()
         
         serializer = CarImageSerializer(image, context={'request': request})
         return Response(serializer.data)
@@ -412,34 +499,48 @@ class CarImageReorderView(views.APIView):
     permission_classes = [IsApprovedWorkerOrAdmin]
 
     def patch(self, request, car_id):
-        car = get_object_or_404(Car, id=car_id)
-        
         serializer = ImageReorderSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
         image_orders = serializer.validated_data['image_orders']
+        order_map = {item['id']: item['order'] for item in image_orders}
+        
+        # Load every image being reordered in one query
+        images = list(CarImage.objects.filter(car_id=car_id, id__in=order_map))
+        missing = order_map.keys() - {image.id for image in images}
+        if missing:
+            return Response(
+                {"error": f"Images with ids {sorted(missing)} not found for this car"},
+                status=status.HTTP_404_NOT_FOUND
+            )
         
-        # Update in transaction
-        with transaction.atomic():
-            for item in image_orders:
-                try:
-                    image = CarImage.objects.get(
-                        id=item['id'],
-                        car=car
-                    )
-                    image.order = item['order']
-                    image.save()
-                except CarImage.DoesNotExist:
-                    return Response(
-                        {"error": f"Image with id {item['id']} not found for this car"},
-                        status=status.HTTP_404_NOT_FOUND
-                    )
+        # (car, order) is unique and checked row by row, so a swap can't be
+        # written in one UPDATE: park the changed rows above the car's
+        # highest order first, then write their final orders
+        changed = [image for image in images if image.order != order_map[image.id]]
+        if changed:
+            try:
+                with transaction.atomic():
+                    top = CarImage.objects.filter(car_id=car_id).aggregate(top=Max('order'))['top']
+                    for offset, image in enumerate(changed, start=1):
+                        image.order = top + offset
+                    CarImage.objects.bulk_update(changed, ['order'], batch_size=500)
+                    for image in changed:
+                        image.order = order_map[image.id]
+                    CarImage.objects.bulk_update(changed, ['order'], batch_size=500)
+            except IntegrityError:
+                # A requested order is held by an image not in the payload
+                return Response(
+                    {"error": "Order values conflict with other images of this car"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
         
-        # Return updated images
-        images = car.images.all()
+        # Return the reordered images in display order from the rows
+        # already in hand, without re-querying
+        images.sort(key=lambda image: (not image.is_primary, image.order, image.uploaded_at))
         serializer = CarImageSerializer(
             images,
             many=True,
             context={'request': request}
         )
-        return Response(serializer.data)
\ No newline at end of file
+        return Response(serializer.data)
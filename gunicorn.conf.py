@@ -0,0 +1,18 @@
+# Gunicorn picks this file up automatically when started from the project
+# root (e.g. `gunicorn autoworld.wsgi`).
+import os
+
+# Threaded workers: a login spends most of its time in Argon2, which
+# releases the GIL, and other requests mostly wait on the database, so
+# threads let fast endpoints run alongside logins instead of queueing
+# behind them. Unlike gevent this needs no monkey-patching of psycopg2.
+worker_class = 'gthread'
+# cpu_count() reports the host's cores, not the container's share, so
+# fall back to a small fixed count when WEB_CONCURRENCY isn't set
+workers = int(os.getenv('WEB_CONCURRENCY', 2))
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+
+timeout = 30
+# Recycle workers now and then to cap slow memory growth
+max_requests = 1000
+max_requests_jitter = 100
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-15 06:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['-date_joined'], name='users_user_date_jo_5abcb7_idx'),
+        ),
+    ]
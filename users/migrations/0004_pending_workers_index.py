@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-15 06:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0003_user_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('is_approved', False), ('is_staff', False)), fields=['-date_joined'], name='pending_workers_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.db import models
+from django.db.models import Q
 from django.utils import timezone
 
 
@@ -35,6 +36,7 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_active = models.BooleanField(default=True)
     is_approved = models.BooleanField(default=False)  # Worker approval status
     date_joined = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)  # Versions CurrentUserView's ETag
 
     objects = UserManager()
 
@@ -44,6 +46,15 @@ class User(AbstractBaseUser, PermissionsMixin):
     class Meta:
         verbose_name = 'User'
         verbose_name_plural = 'Users'
+        indexes = [
+            models.Index(fields=['-date_joined']),  # User lists, newest first
+            # Partial index: only pending workers, in PendingWorkersView's order
+            models.Index(
+                fields=['-date_joined'],
+                condition=Q(is_approved=False, is_staff=False),
+                name='pending_workers_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.email
@@ -1,12 +1,30 @@
 from rest_framework import permissions
 
 
+def _access_flags(request):
+    """
+    Resolve (is_authenticated, is_staff, is_approved) for the request's user
+    once and keep it on the request, so every permission check after the
+    first is a single attribute lookup
+    """
+    flags = getattr(request, '_access_flags', None)
+    if flags is None:
+        user = request.user
+        if user and user.is_authenticated:
+            flags = (True, user.is_staff, user.is_approved)
+        else:
+            flags = (False, False, False)
+        request._access_flags = flags
+    return flags
+
+
 class IsAdmin(permissions.BasePermission):
     """
     Permission check for admin users (staff/superuser)
     """
     def has_permission(self, request, view):
-        return request.user and request.user.is_authenticated and request.user.is_staff
+        authenticated, is_staff, _ = _access_flags(request)
+        return authenticated and is_staff
 
 
 class IsApprovedWorkerOrAdmin(permissions.BasePermission):
@@ -14,15 +32,16 @@ class IsApprovedWorkerOrAdmin(permissions.BasePermission):
     Permission check for approved workers and admins
     """
     def has_permission(self, request, view):
-        if not request.user or not request.user.is_authenticated:
+        authenticated, is_staff, is_approved = _access_flags(request)
+        if not authenticated:
             return False
         
         # Admins always have access
-        if request.user.is_staff:
+        if is_staff:
             return True
         
         # Workers must be approved
-        return request.user.is_approved
+        return is_approved
 
 
 class IsApprovedWorker(permissions.BasePermission):
@@ -30,9 +49,5 @@ class IsApprovedWorker(permissions.BasePermission):
     Permission check for approved workers only (not admins)
     """
     def has_permission(self, request, view):
-        return (
-            request.user and 
-            request.user.is_authenticated and 
-            request.user.is_approved and 
-            not request.user.is_staff
-        )
\ No newline at end of file
+        authenticated, is_staff, is_approved = _access_flags(request)
+        return authenticated and is_approved and not is_staff
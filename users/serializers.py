@@ -1,9 +1,17 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from django.contrib.auth.password_validation import validate_password
+from django.contrib.auth.password_validation import (
+    get_default_password_validators,
+    validate_password,
+)
 
 User = get_user_model()
 
+# Django caches the validator chain per process; build it at import so the
+# first registration on a fresh worker doesn't pay for reading the
+# common-passwords list
+get_default_password_validators()
+
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
     password = serializers.CharField(
@@ -64,30 +72,44 @@ class UserListSerializer(serializers.ModelSerializer):
         fields = ('id', 'email', 'full_name', 'is_staff', 'is_approved', 'date_joined')
 
 
+def _user_id_field():
+    """
+    user_id resolved to a User in one query, loading only what the admin
+    views check and return through UserDetailSerializer
+    """
+    return serializers.PrimaryKeyRelatedField(
+        queryset=User.objects.only(
+            'id', 'email', 'first_name', 'last_name',
+            'is_staff', 'is_approved', 'date_joined'
+        ),
+        error_messages={'does_not_exist': "User does not exist."}
+    )
+
+
 class ApproveUserSerializer(serializers.Serializer):
-    user_id = serializers.IntegerField()
+    user_id = _user_id_field()
     approve = serializers.BooleanField(default=True)
 
-    def validate_user_id(self, value):
-        try:
-            user = User.objects.get(id=value)
-            if user.is_staff:
-                raise serializers.ValidationError("Cannot approve/reject admin users.")
-        except User.DoesNotExist:
-            raise serializers.ValidationError("User does not exist.")
-        return value
+    def validate_user_id(self, user):
+        if user.is_staff:
+            raise serializers.ValidationError("Cannot approve/reject admin users.")
+        return user
+
+
+class BulkApproveSerializer(serializers.Serializer):
+    user_ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=500
+    )
 
 
 class PromoteToAdminSerializer(serializers.Serializer):
-    user_id = serializers.IntegerField()
-
-    def validate_user_id(self, value):
-        try:
-            user = User.objects.get(id=value)
-            if user.is_staff:
-                raise serializers.ValidationError("User is already an admin.")
-            if not user.is_approved:
-                raise serializers.ValidationError("User must be approved before promotion to admin.")
-        except User.DoesNotExist:
-            raise serializers.ValidationError("User does not exist.")
-        return value
\ No newline at end of file
+    user_id = _user_id_field()
+
+    def validate_user_id(self, user):
+        if user.is_staff:
+            raise serializers.ValidationError("User is already an admin.")
+        if not user.is_approved:
+            raise serializers.ValidationError("User must be approved before promotion to admin.")
+        return user
@@ -1,3 +1,162 @@
-from django.test import TestCase
+import orjson
+from django.core.cache import caches
+from rest_framework.test import APITestCase
 
-# Create your tests here.
+from .models import User
+
+
+class UserTestCase(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            'admin@example.com', 'pw123456XX', first_name='A', last_name='B'
+        )
+
+    def make_worker(self, n, **fields):
+        return User.objects.create_user(
+            f'worker{n}@example.com', 'pw123456XX',
+            first_name='W', last_name=str(n), **fields
+        )
+
+
+class LoginTests(UserTestCase):
+
+    def setUp(self):
+        # Throttle counters live in the database cache, outside the
+        # test transaction
+        caches['throttle'].clear()
+        self.addCleanup(caches['throttle'].clear)
+
+    def login(self, email, password='wrong-password', **extra):
+        return self.client.post(
+            '/users/login/', {'email': email, 'password': password}, format='json', **extra
+        )
+
+    def test_login_returns_tokens(self):
+        response = self.login('admin@example.com', 'pw123456XX')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access', response.data['tokens'])
+
+    def test_non_string_credentials_rejected(self):
+        for body in (
+            {'email': 'nobody@example.com', 'password': 12345678},
+            {'email': 'admin@example.com', 'password': ['pw123456XX']},
+            {'email': ['admin@example.com'], 'password': 'pw123456XX'},
+        ):
+            response = self.client.post('/users/login/', body, format='json')
+            self.assertEqual(response.status_code, 400, body)
+
+    def test_email_throttle_spans_client_ips(self):
+        codes = [
+            self.login('admin@example.com', REMOTE_ADDR=f'10.0.0.{n}').status_code
+            for n in range(6)
+        ]
+        self.assertEqual(codes, [401] * 5 + [429])
+
+    def test_ip_throttle_ignores_spoofed_forwarded_prefix(self):
+        codes = [
+            self.login(
+                f'user{n}@example.com', HTTP_X_FORWARDED_FOR=f'10.0.0.{n}, 203.0.113.7'
+            ).status_code
+            for n in range(11)
+        ]
+        self.assertEqual(codes, [401] * 10 + [429])
+
+
+class BulkApproveTests(UserTestCase):
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+
+    def test_bulk_approve_skips_admins_and_approved_users(self):
+        pending = [self.make_worker(n) for n in range(3)]
+        approved = self.make_worker(3, is_approved=True)
+        response = self.client.post(
+            '/users/approve/bulk/',
+            {'user_ids': [user.pk for user in pending] + [approved.pk, self.admin.pk]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['approved'], 3)
+        self.assertFalse(User.objects.filter(is_approved=False, is_staff=False).exists())
+
+    def test_bulk_approve_requires_admin(self):
+        worker = self.make_worker(1, is_approved=True)
+        self.client.force_authenticate(worker)
+        response = self.client.post(
+            '/users/approve/bulk/', {'user_ids': [worker.pk]}, format='json'
+        )
+        self.assertEqual(response.status_code, 403)
+
+
+class CurrentUserETagTests(UserTestCase):
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+
+    def test_unchanged_user_gets_304(self):
+        response = self.client.get('/users/me/')
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        response = self.client.get('/users/me/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_saved_user_gets_new_etag(self):
+        etag = self.client.get('/users/me/')['ETag']
+        self.admin.first_name = 'Changed'
+        self.admin.save()
+
+        response = self.client.get('/users/me/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['first_name'], 'Changed')
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class PendingWorkersTests(UserTestCase):
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+
+    def test_unchanged_list_gets_304(self):
+        self.make_worker(1)
+        etag = self.client.get('/users/pending/')['ETag']
+
+        response = self.client.get('/users/pending/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_approval_changes_etag(self):
+        worker = self.make_worker(1)
+        self.make_worker(2)
+        etag = self.client.get('/users/pending/')['ETag']
+        self.client.post('/users/approve/bulk/', {'user_ids': [worker.pk]}, format='json')
+
+        response = self.client.get('/users/pending/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 1)
+
+
+class UserExportTests(UserTestCase):
+
+    def test_date_joined_matches_the_api(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.get('/users/export/')
+        row = orjson.loads(b''.join(response.streaming_content).splitlines()[0])
+        self.assertEqual(row['date_joined'], self.client.get('/users/me/').data['date_joined'])
+
+
+class UserListTests(UserTestCase):
+
+    def test_lists_are_one_query(self):
+        self.make_worker(1)
+        self.make_worker(2, is_approved=True)
+        self.client.force_authenticate(self.admin)
+        with self.assertNumQueries(1):
+            response = self.client.get('/users/all/')
+        self.assertEqual(len(response.data['results']), 3)
+        # The ETag aggregate, then the page
+        with self.assertNumQueries(2):
+            response = self.client.get('/users/pending/')
+        self.assertEqual(len(response.data['results']), 1)
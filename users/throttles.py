@@ -0,0 +1,27 @@
+import hashlib
+
+from django.core.cache import caches
+from rest_framework.throttling import ScopedRateThrottle, SimpleRateThrottle
+
+
+class LoginIPThrottle(ScopedRateThrottle):
+    """
+    Limits login attempts per client IP (the view's 'login' scope)
+    """
+    cache = caches['throttle']
+
+
+class LoginEmailThrottle(SimpleRateThrottle):
+    """
+    Limits login attempts per target email, whichever IPs they come from,
+    so password guessing against one account is bounded before any hashing
+    """
+    cache = caches['throttle']
+    scope = 'login_email'
+
+    def get_cache_key(self, request, view):
+        email = request.data.get('email')
+        if not email or not isinstance(email, str):
+            return None  # Rejected by the view without hashing anyway
+        digest = hashlib.sha256(email.strip().lower().encode()).hexdigest()
+        return self.cache_format % {'scope': self.scope, 'ident': digest}
@@ -6,8 +6,10 @@ from .views import (
     LogoutView,
     PendingWorkersView,
     ApproveWorkerView,
+    BulkApproveWorkersView,
     PromoteToAdminView,
     AllUsersView,
+    UserExportView,
     CurrentUserView
 )
 
@@ -24,6 +26,8 @@ urlpatterns = [
     # Admin - User Management
     path('pending/', PendingWorkersView.as_view(), name='pending_workers'),
     path('approve/', ApproveWorkerView.as_view(), name='approve_worker'),
+    path('approve/bulk/', BulkApproveWorkersView.as_view(), name='bulk_approve_workers'),
     path('promote/', PromoteToAdminView.as_view(), name='promote_to_admin'),
     path('all/', AllUsersView.as_view(), name='all_users'),
+    path('export/', UserExportView.as_view(), name='export_users'),
 ]
\ No newline at end of file
@@ -1,19 +1,47 @@
-from rest_framework import generics, status, views
+import hashlib
+
+import orjson
+from rest_framework import generics, serializers, status, views
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, make_password
+from django.db.models import Count, Max
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
 from .serializers import (
     UserRegistrationSerializer, 
     UserDetailSerializer,
     UserListSerializer,
     ApproveUserSerializer,
+    BulkApproveSerializer,
     PromoteToAdminSerializer
 )
 from .permissions import IsAdmin
+from .pagination import UserCursorPagination
+from .throttles import LoginEmailThrottle, LoginIPThrottle
+from autoworld.export import format_datetimes, keyset_batches
 
 User = get_user_model()
 
+# Columns login needs: the password check, approval/active flags, the token
+# and the user payload in the response
+_LOGIN_COLUMNS = (
+    'id', 'email', 'password', 'first_name', 'last_name',
+    'is_staff', 'is_active', 'is_approved', 'date_joined'
+)
+
+# Columns UserListSerializer reads (full_name is built from the name fields)
+_USER_LIST_COLUMNS = (
+    'id', 'email', 'first_name', 'last_name', 'is_staff', 'is_approved', 'date_joined'
+)
+
 
 class RegisterView(generics.CreateAPIView):
     """
@@ -31,7 +59,7 @@ class RegisterView(generics.CreateAPIView):
         
         return Response({
             "message": "Registration successful. Please wait for admin approval.",
-            "user": UserDetailSerializer(user).data
+            "user": _user_payload(user)
         }, status=status.HTTP_201_CREATED)
 
 
@@ -41,6 +69,8 @@ class LoginView(views.APIView):
     POST: Login with email and password
     """
     permission_classes = [AllowAny]
+    throttle_classes = [LoginIPThrottle, LoginEmailThrottle]
+    throttle_scope = 'login'
 
     def post(self, request):
         email = request.data.get('email')
@@ -51,16 +81,34 @@ class LoginView(views.APIView):
                 {"error": "Please provide both email and password"},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        # JSON bodies can carry numbers or lists here, which the hashers
+        # reject with a TypeError
+        if not isinstance(email, str) or not isinstance(password, str):
+            return Response(
+                {"error": "Email and password must be strings"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        try:
-            user = User.objects.get(email=email)
-        except User.DoesNotExist:
+        user = User.objects.filter(email=email).only(*_LOGIN_COLUMNS).first()
+        if user is None:
+            # Run the hasher anyway, so an unknown email takes as long to
+            # reject as a wrong password
+            make_password(password)
             return Response(
                 {"error": "Invalid credentials"},
                 status=status.HTTP_401_UNAUTHORIZED
             )
 
-        if not user.check_password(password):
+        # The password is verified even for pending/disabled accounts, so
+        # their state isn't revealed to someone without the password. Those
+        # accounts skip the rehash-on-upgrade though (a second hash plus an
+        # UPDATE), since they can't log in anyway.
+        can_log_in = user.is_active and (user.is_staff or user.is_approved)
+        if can_log_in:
+            password_ok = user.check_password(password)
+        else:
+            password_ok = check_password(password, user.password)
+        if not password_ok:
             return Response(
                 {"error": "Invalid credentials"},
                 status=status.HTTP_401_UNAUTHORIZED
@@ -84,7 +132,7 @@ class LoginView(views.APIView):
 
         return Response({
             "message": "Login successful",
-            "user": UserDetailSerializer(user).data,
+            "user": _user_payload(user),
             "tokens": {
                 "refresh": str(refresh),
                 "access": str(refresh.access_token)
@@ -92,11 +140,59 @@ class LoginView(views.APIView):
         }, status=status.HTTP_200_OK)
 
 
+_date_joined_field = serializers.DateTimeField()
+
+
+def _user_payload(user):
+    """
+    UserDetailSerializer's output built directly, for the endpoints that
+    return a single user, without instantiating a serializer per response
+    """
+    return {
+        'id': user.pk,
+        'email': user.email,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'full_name': user.full_name,
+        'is_staff': user.is_staff,
+        'is_approved': user.is_approved,
+        'is_worker': user.is_worker,
+        'date_joined': _date_joined_field.to_representation(user.date_joined),
+    }
+
+
+def _etag_matches(request, etag):
+    """Whether the request's If-None-Match already holds etag (weak comparison)"""
+    client_etags = parse_etags(request.headers.get('If-None-Match', ''))
+    return etag in (tag.removeprefix('W/') for tag in client_etags)
+
+
+def _blacklist_refresh_token(token):
+    """
+    Blacklist an already verified refresh token. Tokens issued by this API
+    have an OutstandingToken row, so this is one lookup and one INSERT
+    instead of token.blacklist()'s user fetch and get_or_create round trips.
+    """
+    outstanding_id = OutstandingToken.objects.filter(
+        jti=token[api_settings.JTI_CLAIM]
+    ).values_list('id', flat=True).first()
+    if outstanding_id is None:
+        token.blacklist()  # Not issued here; let simplejwt record it
+        return
+    BlacklistedToken.objects.bulk_create(
+        [BlacklistedToken(token_id=outstanding_id)],
+        ignore_conflicts=True  # Already blacklisted by a concurrent logout
+    )
+
+
 class LogoutView(views.APIView):
     """
     Logout endpoint - blacklist refresh token
     POST: Logout user
     """
+    # Only the access token's signature needs checking here, not the user
+    # row, so authenticate without the per-request user SELECT
+    authentication_classes = [JWTStatelessUserAuthentication]
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
@@ -104,7 +200,7 @@ class LogoutView(views.APIView):
             refresh_token = request.data.get("refresh")
             if refresh_token:
                 token = RefreshToken(refresh_token)
-                token.blacklist()
+                _blacklist_refresh_token(token)
             return Response(
                 {"message": "Logout successful"},
                 status=status.HTTP_205_RESET_CONTENT
@@ -123,9 +219,31 @@ class PendingWorkersView(generics.ListAPIView):
     """
     permission_classes = [IsAdmin]
     serializer_class = UserListSerializer
+    pagination_class = UserCursorPagination
 
     def get_queryset(self):
-        return User.objects.filter(is_approved=False, is_staff=False).order_by('-date_joined')
+        # UserListSerializer reads no relations, so there is nothing to
+        # join or prefetch; only() keeps the password hash out of the rows
+        return User.objects.filter(
+            is_approved=False, is_staff=False
+        ).only(*_USER_LIST_COLUMNS).order_by('-date_joined')
+
+    def list(self, request, *args, **kwargs):
+        # Versioned by how many workers are pending and their latest change.
+        # A Last-Modified date alone would miss approvals and rejections,
+        # which remove rows from the list without a newer timestamp in it.
+        state = self.get_queryset().order_by().aggregate(
+            count=Count('id'), last_change=Max('updated_at')
+        )
+        version = f"{request.get_full_path()}|{state['count']}|{state['last_change']}"
+        etag = f'"{hashlib.md5(version.encode(), usedforsecurity=False).hexdigest()}"'
+        if _etag_matches(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = super().list(request, *args, **kwargs)
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
 
 
 class ApproveWorkerView(views.APIView):
@@ -139,32 +257,49 @@ class ApproveWorkerView(views.APIView):
         serializer = ApproveUserSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        user_id = serializer.validated_data['user_id']
+        # Already looked up (and checked) by the serializer
+        user = serializer.validated_data['user_id']
         approve = serializer.validated_data['approve']
 
-        try:
-            user = User.objects.get(id=user_id)
-            
-            if approve:
-                user.is_approved = True
-                user.save()
-                return Response({
-                    "message": f"Worker {user.email} has been approved",
-                    "user": UserDetailSerializer(user).data
-                }, status=status.HTTP_200_OK)
-            else:
-                # Reject - delete the user
-                email = user.email
-                user.delete()
-                return Response({
-                    "message": f"Worker {email} has been rejected and removed"
-                }, status=status.HTTP_200_OK)
-                
-        except User.DoesNotExist:
-            return Response(
-                {"error": "User not found"},
-                status=status.HTTP_404_NOT_FOUND
-            )
+        if approve:
+            user.is_approved = True
+            user.save(update_fields=['is_approved', 'updated_at'])
+            return Response({
+                "message": f"Worker {user.email} has been approved",
+                "user": _user_payload(user)
+            }, status=status.HTTP_200_OK)
+        else:
+            # Reject - delete the user
+            email = user.email
+            user.delete()
+            return Response({
+                "message": f"Worker {email} has been rejected and removed"
+            }, status=status.HTTP_200_OK)
+
+
+class BulkApproveWorkersView(views.APIView):
+    """
+    Approve several pending workers at once
+    POST: {"user_ids": [1, 2, ...]}
+    """
+    permission_classes = [IsAdmin]
+
+    def post(self, request):
+        serializer = BulkApproveSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        # One UPDATE for the whole batch; admins and already-approved
+        # users are skipped
+        approved = User.objects.filter(
+            id__in=serializer.validated_data['user_ids'],
+            is_approved=False,
+            is_staff=False
+        ).update(is_approved=True, updated_at=timezone.now())
+
+        return Response({
+            "message": f"{approved} worker(s) have been approved",
+            "approved": approved
+        }, status=status.HTTP_200_OK)
 
 
 class PromoteToAdminView(views.APIView):
@@ -178,23 +313,15 @@ class PromoteToAdminView(views.APIView):
         serializer = PromoteToAdminSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        user_id = serializer.validated_data['user_id']
-
-        try:
-            user = User.objects.get(id=user_id)
-            user.is_staff = True
-            user.save()
-            
-            return Response({
-                "message": f"{user.email} has been promoted to admin",
-                "user": UserDetailSerializer(user).data
-            }, status=status.HTTP_200_OK)
-                
-        except User.DoesNotExist:
-            return Response(
-                {"error": "User not found"},
-                status=status.HTTP_404_NOT_FOUND
-            )
+        # Already looked up (and checked) by the serializer
+        user = serializer.validated_data['user_id']
+        user.is_staff = True
+        user.save(update_fields=['is_staff', 'updated_at'])
+        
+        return Response({
+            "message": f"{user.email} has been promoted to admin",
+            "user": _user_payload(user)
+        }, status=status.HTTP_200_OK)
 
 
 class AllUsersView(generics.ListAPIView):
@@ -204,7 +331,42 @@ class AllUsersView(generics.ListAPIView):
     """
     permission_classes = [IsAdmin]
     serializer_class = UserListSerializer
-    queryset = User.objects.all().order_by('-date_joined')
+    pagination_class = UserCursorPagination
+
+    def get_queryset(self):
+        return User.objects.only(*_USER_LIST_COLUMNS).order_by('-date_joined')
+
+
+_USER_EXPORT_FIELDS = (
+    'id', 'email', 'first_name', 'last_name',
+    'is_staff', 'is_active', 'is_approved', 'date_joined',
+)
+_USER_EXPORT_BATCH_SIZE = 2000
+
+
+def _stream_ndjson(batches):
+    """Encode rows as newline-delimited JSON, a batch per chunk"""
+    for batch in batches:
+        yield b''.join(orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE) for row in batch)
+
+
+class UserExportView(views.APIView):
+    """
+    Export all users as newline-delimited JSON (admin only)
+    GET: Stream every user, one JSON object per line
+    """
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        batches = keyset_batches(
+            User.objects.values(*_USER_EXPORT_FIELDS), _USER_EXPORT_BATCH_SIZE
+        )
+        response = StreamingHttpResponse(
+            _stream_ndjson(format_datetimes(batches, ('date_joined',))),
+            content_type='application/x-ndjson'
+        )
+        response['Content-Disposition'] = 'attachment; filename="users.ndjson"'
+        return response
 
 
 class CurrentUserView(generics.RetrieveAPIView):
@@ -216,4 +378,18 @@ class CurrentUserView(generics.RetrieveAPIView):
     serializer_class = UserDetailSerializer
 
     def get_object(self):
-        return self.request.user
\ No newline at end of file
+        return self.request.user
+
+    def retrieve(self, request, *args, **kwargs):
+        user = self.get_object()
+        # Changes whenever the user row is saved, so clients polling with
+        # If-None-Match get a 304 without the user being re-serialized
+        etag = f'"{user.pk}-{int(user.updated_at.timestamp() * 1_000_000)}"'
+        if _etag_matches(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(_user_payload(user))
+        response['ETag'] = etag
+        # Per-user data: browsers may keep it, but must revalidate each time
+        patch_cache_control(response, private=True, no_cache=True)
+        return response